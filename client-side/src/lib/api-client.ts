@@ -8,6 +8,10 @@ interface FetchOptions extends RequestInit {
   token?: string;
 }
 
+// After a write, the API asks us (via X-Read-Primary-For) to read from the
+// primary database for a few seconds so replica lag never hides our change.
+let readPrimaryUntil = 0;
+
 export async function fetchClient<T>(
   endpoint: string,
   method: RequestMethod = 'GET',
@@ -22,6 +26,8 @@ export async function fetchClient<T>(
   const headersInit: HeadersInit = {
     'Content-Type': 'application/json',
     ...(token && { Authorization: `Bearer ${token}` }),
+    ...(method === 'GET' &&
+      Date.now() < readPrimaryUntil && { 'X-Read-Consistency': 'primary' }),
     ...headers,
   } as HeadersInit;
 
@@ -49,6 +55,14 @@ export async function fetchClient<T>(
       throw new Error(errorData?.detail || `API Error: ${response.statusText}`);
     }
 
+    const readPrimaryFor = Number(response.headers.get('X-Read-Primary-For'));
+    if (method !== 'GET' && readPrimaryFor > 0) {
+      readPrimaryUntil = Math.max(
+        readPrimaryUntil,
+        Date.now() + readPrimaryFor * 1000,
+      );
+    }
+
     // Return null for 204 No Content
     if (response.status === 204) {
       return null as T;
@@ -1,2 +1 @@
 from .database import connect_db, disconnect_db, get_prisma_client
-db = get_prisma_client()
@@ -0,0 +1,402 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: the single-worker rule is only documented
+    fcntl = None
+
+from app.config import settings
+from app.database import get_prisma_client
+
+# (employee_id, date) -> status
+BufferKey = Tuple[str, date]
+
+
+class AttendanceWriteBuffer:
+    """In-process write-behind queue for attendance marks.
+
+    Marks are deduplicated on (employee_id, date) with last-write-wins and
+    flushed to the database as one batched upsert every ``flush_interval_ms``
+    or as soon as ``flush_max_items`` marks are pending.
+
+    With ``log_path`` set, every mark is appended to a log before it is
+    acknowledged. While a batch is being flushed its entries live in
+    ``<log_path>.flushing``; that file is only removed once every mark in it
+    is in the database. The log belongs to a single process.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = 200,
+        flush_max_items: int = 500,
+        log_path: str = ""
+    ):
+        self.flush_interval = max(flush_interval_ms, 1) / 1000
+        self.flush_max_items = max(flush_max_items, 1)
+        self.log_path = log_path
+
+        self._pending: Dict[BufferKey, str] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self._log_file = None
+        self._lock_file = None
+        # Serialises log writes and rotation; both run in a worker thread
+        self._log_lock = asyncio.Lock()
+        self._log_backlog: List[Tuple[str, asyncio.Future]] = []
+        self._log_writer: Optional[asyncio.Task] = None
+
+        # Flush metrics
+        self.flush_count = 0
+        self.failed_flush_count = 0
+        self.items_flushed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def start(self):
+        """Replay the crash-recovery log (if any) and start the flush loop.
+
+        Recovered marks are flushed by the loop, so startup does not depend
+        on the database being reachable.
+        """
+        if self.log_path:
+            self._acquire_log_lock()
+            await asyncio.to_thread(self._replay_log)
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+            if self._pending:
+                print(f"♻️ Recovered {len(self._pending)} queued attendance marks")
+                self._wakeup.set()
+
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        print("✅ Attendance write buffer started")
+
+    async def stop(self):
+        """Stop the flush loop and flush whatever is still queued"""
+        if self._task:
+            # Let an in-flight flush finish instead of cancelling it mid-write
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await self.flush()
+        if self._pending:
+            where = "the recovery log" if self.log_path else "memory only and are lost"
+            print(f"⚠️ {len(self._pending)} attendance marks could not be flushed; they remain in {where}")
+
+        if self._log_writer:
+            await asyncio.gather(self._log_writer, return_exceptions=True)
+            self._log_writer = None
+        if self._log_file:
+            self._log_file.close()
+            self._log_file = None
+        if self._lock_file:
+            self._lock_file.close()
+            self._lock_file = None
+        print("❌ Attendance write buffer stopped")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            try:
+                await self.flush()
+            except Exception as e:
+                # Never let one bad flush stop the loop
+                print(f"⚠️ Attendance flush loop error: {e}")
+
+    # ------------------------------------------------------------------
+    # Queueing
+    # ------------------------------------------------------------------
+    async def enqueue(self, employee_id: str, attendance_date: date, status: str):
+        """Queue an attendance mark, replacing any pending mark for the same day.
+
+        Returns once the mark is in memory and, if enabled, synced to the log.
+        """
+        # Memory first: a flush rotating the log in between still picks the mark up
+        self._pending[(employee_id, attendance_date)] = status
+
+        if len(self._pending) >= self.flush_max_items:
+            self._wakeup.set()
+
+        if self._log_file:
+            await self._append_log([(employee_id, attendance_date, status)])
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _requeue(self, marks: Dict[BufferKey, str]):
+        # Marks queued since the batch was taken are newer and win
+        for key, status in marks.items():
+            self._pending.setdefault(key, status)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+    async def flush(self) -> int:
+        """Write all pending marks in one batched upsert. Returns rows written.
+
+        Marks that cannot be written are put back in the queue for the next flush.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+
+            # Swap the queue before awaiting so new marks go to a fresh batch
+            batch = self._pending
+            self._pending = {}
+
+            try:
+                flushing_path = await self._rotate_log()
+            except Exception as e:
+                print(f"⚠️ Failed to rotate attendance buffer log: {e}")
+                self._requeue(batch)
+                return 0
+            except BaseException:
+                self._requeue(batch)
+                raise
+
+            started = time.perf_counter()
+            try:
+                written, unwritten = await self._write(batch)
+            except BaseException:
+                # Cancelled mid-write: upserts are idempotent, so the whole
+                # batch goes back rather than risk losing part of it
+                self._requeue(batch)
+                raise
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.items_flushed += written
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            self.total_flush_ms += elapsed_ms
+
+            if unwritten:
+                # The .flushing log stays as the durable copy of these marks
+                self._requeue(unwritten)
+            elif flushing_path:
+                os.remove(flushing_path)
+
+            return written
+
+    async def _write(self, batch: Dict[BufferKey, str]) -> Tuple[int, Dict[BufferKey, str]]:
+        """Batched upsert with a per-item fallback; returns (written, unwritten)"""
+        try:
+            await self._write_batch(batch)
+            return len(batch), {}
+        except Exception as e:
+            self.failed_flush_count += 1
+            print(f"⚠️ Batched attendance flush failed, retrying per item: {e}")
+            return await self._write_individually(batch)
+
+    async def _write_batch(self, batch: Dict[BufferKey, str]):
+        db = get_prisma_client()
+        async with db.batch_() as batcher:
+            for (employee_id, attendance_date), status in batch.items():
+                batcher.attendance.upsert(**self._upsert_args(employee_id, attendance_date, status))
+
+    async def _write_individually(self, batch: Dict[BufferKey, str]) -> Tuple[int, Dict[BufferKey, str]]:
+        """Fallback when the batch fails (e.g. an employee was deleted meanwhile).
+
+        Returns the number of rows written and the marks that should be retried.
+        """
+        db = get_prisma_client()
+        written = 0
+        unwritten: Dict[BufferKey, str] = {}
+        items = list(batch.items())
+
+        for index, ((employee_id, attendance_date), status) in enumerate(items):
+            try:
+                await db.attendance.upsert(**self._upsert_args(employee_id, attendance_date, status))
+                written += 1
+                continue
+            except Exception as e:
+                error = e
+
+            try:
+                employee = await db.employee.find_unique(where={"id": employee_id})
+            except Exception as e:
+                # Database unreachable: keep this and every remaining mark
+                print(f"⚠️ Database unavailable, keeping {len(items) - index} attendance marks queued: {e}")
+                unwritten.update(items[index:])
+                break
+
+            if employee is None:
+                print(f"⚠️ Dropping attendance mark for missing employee {employee_id}")
+            else:
+                print(f"⚠️ Failed to write attendance for {employee_id}: {error}")
+                unwritten[(employee_id, attendance_date)] = status
+
+        return written, unwritten
+
+    @staticmethod
+    def _upsert_args(employee_id: str, attendance_date: date, status: str) -> dict:
+        attendance_datetime = datetime.combine(attendance_date, datetime.min.time())
+        return {
+            "where": {
+                "employeeId_date": {
+                    "employeeId": employee_id,
+                    "date": attendance_datetime
+                }
+            },
+            "data": {
+                "create": {
+                    "employeeId": employee_id,
+                    "date": attendance_datetime,
+                    "status": status
+                },
+                "update": {"status": status}
+            }
+        }
+
+    # ------------------------------------------------------------------
+    # Crash-recovery log
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _log_line(employee_id: str, attendance_date: date, status: str) -> str:
+        return json.dumps({
+            "employee_id": employee_id,
+            "date": attendance_date.isoformat(),
+            "status": status
+        }) + "\n"
+
+    def _acquire_log_lock(self):
+        """Refuse to share the log with another worker process"""
+        if fcntl is None:
+            return
+        self._lock_file = open(f"{self.log_path}.lock", "w")
+        try:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(
+                f"{self.log_path} is in use by another process; "
+                "ATTENDANCE_BUFFER_LOG_PATH supports a single worker only"
+            )
+
+    async def _append_log(self, entries: List[Tuple[str, date, str]]):
+        future = asyncio.get_running_loop().create_future()
+        self._log_backlog.append(("".join(self._log_line(*entry) for entry in entries), future))
+        if self._log_writer is None or self._log_writer.done():
+            self._log_writer = asyncio.create_task(self._write_log_backlog())
+        await future
+
+    async def _write_log_backlog(self):
+        """Group commit: marks queued while one fsync runs share the next one"""
+        while self._log_backlog:
+            backlog, self._log_backlog = self._log_backlog, []
+            text = "".join(lines for lines, _ in backlog)
+            try:
+                async with self._log_lock:
+                    await asyncio.to_thread(self._write_log, text)
+            except Exception as e:
+                for _, future in backlog:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, future in backlog:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _write_log(self, text: str):
+        self._log_file.write(text)
+        self._log_file.flush()
+        os.fsync(self._log_file.fileno())
+
+    async def _rotate_log(self) -> Optional[str]:
+        """Move the active log aside so it only covers the batch being flushed"""
+        if not self._log_file:
+            return None
+        async with self._log_lock:
+            return await asyncio.to_thread(self._rotate_log_files)
+
+    def _rotate_log_files(self) -> str:
+        flushing_path = f"{self.log_path}.flushing"
+        self._log_file.close()
+
+        if os.path.exists(flushing_path):
+            # A failed flush left marks behind: append, never overwrite them
+            with open(self.log_path, encoding="utf-8") as src, open(flushing_path, "a", encoding="utf-8") as dst:
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.log_path)
+        else:
+            os.replace(self.log_path, flushing_path)
+
+        self._log_file = open(self.log_path, "a", encoding="utf-8")
+        return flushing_path
+
+    def _replay_log(self):
+        # A leftover ".flushing" file is older than the active log
+        for path in (f"{self.log_path}.flushing", self.log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        key = (entry["employee_id"], date.fromisoformat(entry["date"]))
+                        self._pending[key] = entry["status"]
+                    except (ValueError, KeyError):
+                        # Torn write from a crash mid-append
+                        continue
+
+        # Fold everything into the active log and discard the old flushing file
+        with open(f"{self.log_path}.tmp", "w", encoding="utf-8") as f:
+            for (employee_id, attendance_date), status in self._pending.items():
+                f.write(self._log_line(employee_id, attendance_date, status))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{self.log_path}.tmp", self.log_path)
+        if os.path.exists(f"{self.log_path}.flushing"):
+            os.remove(f"{self.log_path}.flushing")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def stats(self) -> dict:
+        return {
+            "enabled": True,
+            "pending": len(self._pending),
+            "flush_count": self.flush_count,
+            "failed_flush_count": self.failed_flush_count,
+            "items_flushed": self.items_flushed,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+            "avg_flush_ms": round(self.total_flush_ms / self.flush_count, 2) if self.flush_count else 0.0
+        }
+
+
+# Global variable to hold the buffer instance (only when write-behind is enabled)
+_buffer: Optional[AttendanceWriteBuffer] = None
+
+def get_attendance_buffer() -> Optional[AttendanceWriteBuffer]:
+    global _buffer
+    if _buffer is None and settings.attendance_write_behind:
+        _buffer = AttendanceWriteBuffer(
+            flush_interval_ms=settings.attendance_flush_interval_ms,
+            flush_max_items=settings.attendance_flush_max_items,
+            log_path=settings.attendance_buffer_log_path
+        )
+    return _buffer
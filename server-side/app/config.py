@@ -7,6 +7,29 @@ class Settings(BaseSettings):
     # Prisma will still need the actual DATABASE_URL environment variable to connect.
     database_url: str = Field(default="", validation_alias="DATABASE_URL")
     cors_origins: str = Field(default="*", validation_alias="CORS_ORIGINS")
+    # Default isolation for request transactions: READ COMMITTED, REPEATABLE READ or SERIALIZABLE
+    db_isolation_level: str = Field(default="READ COMMITTED", validation_alias="DB_ISOLATION_LEVEL")
+
+    # Optional comma-separated read replica URLs; GET routes read from these
+    database_replica_urls: str = Field(default="", validation_alias="DATABASE_REPLICA_URLS")
+    # After a write, the same client reads from the primary for this many seconds
+    replica_sticky_seconds: int = Field(default=5, validation_alias="REPLICA_STICKY_SECONDS")
+    # A failed replica is skipped (and, if disconnected, reconnected) after this many seconds
+    replica_retry_seconds: int = Field(default=30, validation_alias="REPLICA_RETRY_SECONDS")
+
+    # Attendance write-behind buffer (disabled by default).
+    # Marks are queued in-process and flushed as batched upserts.
+    attendance_write_behind: bool = Field(default=False, validation_alias="ATTENDANCE_WRITE_BEHIND")
+    attendance_flush_interval_ms: int = Field(default=200, validation_alias="ATTENDANCE_FLUSH_INTERVAL_MS")
+    attendance_flush_max_items: int = Field(default=500, validation_alias="ATTENDANCE_FLUSH_MAX_ITEMS")
+    # Optional append-only log used to replay queued marks after a crash
+    attendance_buffer_log_path: str = Field(default="", validation_alias="ATTENDANCE_BUFFER_LOG_PATH")
+
+    # Monthly attendance partitions (see manage_partitions.py)
+    attendance_partitions_ahead: int = Field(default=3, validation_alias="ATTENDANCE_PARTITIONS_AHEAD")
+    # Months of attendance to keep online; 0 keeps everything
+    attendance_retention_months: int = Field(default=0, validation_alias="ATTENDANCE_RETENTION_MONTHS")
+    attendance_archive_dir: str = Field(default="archive", validation_alias="ATTENDANCE_ARCHIVE_DIR")
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -21,4 +44,8 @@ class Settings(BaseSettings):
             return ["*"]
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def database_replica_urls_list(self) -> List[str]:
+        return [url.strip() for url in self.database_replica_urls.split(",") if url.strip()]
+
 settings = Settings()
@@ -1,9 +1,31 @@
+import asyncio
+import inspect
+import time
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator, Optional
+from contextvars import ContextVar
+from itertools import cycle
+from typing import AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
 
 # Global variable to hold the Prisma instance
 _db: Optional['Prisma'] = None
 
+# Read replica clients and the round-robin over them
+_replicas: Optional[List['Prisma']] = None
+_replica_cycle: Optional[Iterator['Prisma']] = None
+# id(replica) -> time before which it is skipped after a failure
+_replica_retry_at: Dict[int, float] = {}
+_reconnect_task: Optional[asyncio.Task] = None
+
+# Set per request when reads must see the primary (read-your-writes)
+_read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+READ_CONSISTENCY_HEADER = "x-read-consistency"
+# Tells clients how long to keep sending X-Read-Consistency: primary after a write
+READ_PRIMARY_FOR_HEADER = "x-read-primary-for"
+STICKY_PRIMARY_COOKIE = "hrms_read_primary_until"
+
 def get_prisma_client():
     global _db
     if _db is None:
@@ -11,6 +33,98 @@ def get_prisma_client():
         _db = Prisma()
     return _db
 
+def get_replica_clients() -> List['Prisma']:
+    global _replicas, _replica_cycle
+    if _replicas is None:
+        from prisma import Prisma
+        _replicas = [
+            Prisma(datasource={"url": url})
+            for url in settings.database_replica_urls_list
+        ]
+        _replica_cycle = cycle(_replicas) if _replicas else None
+    return _replicas
+
+def get_read_client():
+    """Client for read-only queries.
+
+    Returns the next healthy replica, or the primary when no replica is
+    configured or healthy, or the current request needs read-your-writes.
+    """
+    replicas = get_replica_clients()
+    if replicas and not _read_from_primary.get():
+        now = time.monotonic()
+        for _ in range(len(replicas)):
+            client = next(_replica_cycle)
+            if client.is_connected() and _replica_retry_at.get(id(client), 0) <= now:
+                return client
+    return get_prisma_client()
+
+def _mark_replica_down(replica):
+    _replica_retry_at[id(replica)] = time.monotonic() + settings.replica_retry_seconds
+
+async def _reconnect_replicas():
+    """Reconnect replicas that were down at startup, at most once per retry interval"""
+    now = time.monotonic()
+    for index, replica in enumerate(get_replica_clients(), start=1):
+        if replica.is_connected() or _replica_retry_at.get(id(replica), 0) > now:
+            continue
+        try:
+            await replica.connect()
+            _replica_retry_at.pop(id(replica), None)
+            print(f"✅ Read replica {index} reconnected")
+        except Exception as e:
+            _mark_replica_down(replica)
+            print(f"⚠️ Failed to reconnect read replica {index}: {e}")
+
+def _schedule_replica_reconnect():
+    global _reconnect_task
+    now = time.monotonic()
+    due = any(
+        not replica.is_connected() and _replica_retry_at.get(id(replica), 0) <= now
+        for replica in get_replica_clients()
+    )
+    if due and (_reconnect_task is None or _reconnect_task.done()):
+        # In the background so no request waits on a connect timeout
+        _reconnect_task = asyncio.create_task(_reconnect_replicas())
+
+class ReplicaReadClient:
+    """A replica client whose queries are retried once on the primary.
+
+    Reads are idempotent, so a failed query is simply re-run on the primary.
+    If the primary succeeds the replica is taken to be unhealthy and skipped
+    for ``REPLICA_RETRY_SECONDS``; if it fails too, the primary's error is
+    raised and the replica is left alone.
+    """
+
+    def __init__(self, replica, primary, path: Tuple[str, ...] = ()):
+        self._replica = replica
+        self._primary = primary
+        self._path = path
+
+    def __getattr__(self, name):
+        path = self._path + (name,)
+        target = _resolve(self._replica, path)
+        if inspect.iscoroutinefunction(target):
+            async def call(*args, **kwargs):
+                try:
+                    return await target(*args, **kwargs)
+                except Exception as e:
+                    replica_error = e
+                result = await _resolve(self._primary, path)(*args, **kwargs)
+                _mark_replica_down(self._replica)
+                print(f"⚠️ Read replica query failed, served from primary: {replica_error}")
+                return result
+            return call
+        if callable(target) or not hasattr(target, "__dict__"):
+            return target
+        # Model actions (e.g. ``client.employee``): keep wrapping their methods
+        return ReplicaReadClient(self._replica, self._primary, path)
+
+def _resolve(client, path: Tuple[str, ...]):
+    for name in path:
+        client = getattr(client, name)
+    return client
+
 async def connect_db():
     """Connect to database"""
     client = get_prisma_client()
@@ -18,17 +132,104 @@ async def connect_db():
         await client.connect()
     print("✅ Database connected successfully")
 
+    for index, replica in enumerate(get_replica_clients(), start=1):
+        try:
+            if not replica.is_connected():
+                await replica.connect()
+            print(f"✅ Read replica {index} connected")
+        except Exception as e:
+            # Reads fall back to the primary; reconnects are retried lazily
+            _mark_replica_down(replica)
+            print(f"⚠️ Failed to connect to read replica {index}: {e}")
+
 async def disconnect_db():
     """Disconnect from database"""
+    for replica in get_replica_clients():
+        if replica.is_connected():
+            await replica.disconnect()
+
     client = get_prisma_client()
     if client.is_connected():
         await client.disconnect()
     print("❌ Database disconnected")
 
-@asynccontextmanager
-async def get_db() -> AsyncGenerator['Prisma', None]:
-    """Database session dependency"""
+async def read_routing_middleware(request, call_next):
+    """Route reads to the primary when the client asks for it or has just written.
+
+    Clients can send ``X-Read-Consistency: primary`` on any request. Every
+    successful write answers with ``X-Read-Primary-For: <seconds>`` so
+    cross-origin clients know how long to keep sending that header; same-site
+    clients also get a short-lived cookie that does the same automatically.
+    """
+    if not settings.database_replica_urls_list:
+        return await call_next(request)
+
+    sticky_until = request.cookies.get(STICKY_PRIMARY_COOKIE)
     try:
-        yield get_prisma_client()
+        sticky = sticky_until is not None and float(sticky_until) > time.time()
+    except ValueError:
+        sticky = False
+
+    wants_primary = request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary"
+    token = _read_from_primary.set(sticky or wants_primary)
+    try:
+        response = await call_next(request)
     finally:
-        pass
+        _read_from_primary.reset(token)
+
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.headers[READ_PRIMARY_FOR_HEADER] = str(settings.replica_sticky_seconds)
+        response.set_cookie(
+            STICKY_PRIMARY_COOKIE,
+            str(time.time() + settings.replica_sticky_seconds),
+            max_age=settings.replica_sticky_seconds,
+            httponly=True,
+            samesite="lax"
+        )
+    return response
+
+ISOLATION_LEVELS = ("READ COMMITTED", "REPEATABLE READ", "SERIALIZABLE")
+
+@asynccontextmanager
+async def transaction(client=None, isolation: Optional[str] = None) -> AsyncGenerator['Prisma', None]:
+    """Run the enclosed queries as one transaction on the primary.
+
+    Commits when the block exits cleanly and rolls back on any exception,
+    including ``HTTPException``. ``isolation`` defaults to ``DB_ISOLATION_LEVEL``.
+    """
+    isolation = (isolation or settings.db_isolation_level).upper()
+    if isolation not in ISOLATION_LEVELS:
+        raise ValueError(f"Unsupported isolation level: {isolation}")
+
+    client = client or get_prisma_client()
+    async with client.tx() as tx:
+        # Must be the first statement of the transaction to take effect
+        await tx.execute_raw(f"SET TRANSACTION ISOLATION LEVEL {isolation}")
+        yield tx
+
+async def get_db() -> AsyncGenerator['Prisma', None]:
+    """Request-scoped primary client dependency"""
+    yield get_prisma_client()
+
+async def get_read_db() -> AsyncGenerator['Prisma', None]:
+    """Request-scoped read client dependency (replica when available).
+
+    Queries that fail on a replica are retried once on the primary.
+    """
+    if get_replica_clients():
+        _schedule_replica_reconnect()
+    client = get_read_client()
+    primary = get_prisma_client()
+    yield client if client is primary else ReplicaReadClient(client, primary)
+
+def get_transaction(isolation: Optional[str] = None):
+    """Build a dependency that wraps the handler in one transaction.
+
+    Declare it with ``Depends(get_transaction(), scope="function")`` so the
+    transaction commits (or rolls back on any exception, ``HTTPException``
+    included) before the response is sent and commit failures surface as errors.
+    """
+    async def dependency() -> AsyncGenerator['Prisma', None]:
+        async with transaction(isolation=isolation) as tx:
+            yield tx
+    return dependency
@@ -0,0 +1,146 @@
+from datetime import date
+from typing import List
+
+from app.database import get_prisma_client
+from app.models.schemas import DepartmentSummary
+
+HEADCOUNT_TRIGGER = "employees_department_headcount"
+
+
+async def get_department_directory(client, day: date) -> List[DepartmentSummary]:
+    """Departments with headcount and attendance counts for `day`.
+
+    Headcounts come from the maintained `departments` table; attendance is
+    aggregated from that day's marks only, so this is a single cheap query.
+    """
+    rows = await client.query_raw(
+        """
+        SELECT d."name", d."headcount",
+               COALESCE(t."present", 0)::int AS "present",
+               COALESCE(t."absent", 0)::int AS "absent"
+        FROM "departments" d
+        LEFT JOIN (
+            SELECT e."department",
+                   COUNT(*) FILTER (WHERE a."status" = 'PRESENT') AS "present",
+                   COUNT(*) FILTER (WHERE a."status" = 'ABSENT') AS "absent"
+            FROM "attendance" a
+            JOIN "employees" e ON e."id" = a."employeeId"
+            WHERE a."date" = $1::timestamp
+            GROUP BY e."department"
+        ) t ON t."department" = d."name"
+        WHERE d."headcount" > 0
+        ORDER BY d."name"
+        """,
+        day.isoformat()
+    )
+
+    return [
+        DepartmentSummary(
+            name=row["name"],
+            headcount=row["headcount"],
+            present_today=row["present"],
+            absent_today=row["absent"],
+            not_marked_today=max(row["headcount"] - row["present"] - row["absent"], 0)
+        )
+        for row in rows
+    ]
+
+
+async def install_department_trigger(client):
+    """Keep department headcounts in sync with every write to `employees`.
+
+    A trigger also covers writes that bypass the API (seeds, manual SQL,
+    cascades) and is idempotent to install.
+    """
+    await client.execute_raw(
+        """
+        CREATE OR REPLACE FUNCTION "departments_sync_headcount"() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD."department" IS NOT DISTINCT FROM NEW."department" THEN
+                RETURN NULL;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE "departments"
+                SET "headcount" = "headcount" - 1, "updatedAt" = NOW()
+                WHERE "name" = OLD."department";
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO "departments" ("name", "headcount", "updatedAt")
+                VALUES (NEW."department", 1, NOW())
+                ON CONFLICT ("name") DO UPDATE
+                SET "headcount" = "departments"."headcount" + 1, "updatedAt" = NOW();
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    await client.execute_raw(f'DROP TRIGGER IF EXISTS "{HEADCOUNT_TRIGGER}" ON "employees"')
+    await client.execute_raw(
+        f"""
+        CREATE TRIGGER "{HEADCOUNT_TRIGGER}"
+        AFTER INSERT OR DELETE OR UPDATE OF "department" ON "employees"
+        FOR EACH ROW EXECUTE FUNCTION "departments_sync_headcount"()
+        """
+    )
+
+
+async def department_trigger_installed(client) -> bool:
+    """Whether the headcount trigger exists and is enabled on `employees`"""
+    row = await client.query_first(
+        """
+        SELECT COUNT(*)::int AS count
+        FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE t.tgname = $1
+          AND t.tgenabled <> 'D'
+          AND c.relname = 'employees'
+          AND n.nspname = current_schema()
+        """,
+        HEADCOUNT_TRIGGER
+    )
+    return bool(row and row["count"])
+
+
+async def require_department_trigger():
+    """Fail startup when the headcount trigger is missing.
+
+    Without it every headcount (and the dashboard total) silently drifts.
+    """
+    if not await department_trigger_installed(get_prisma_client()):
+        raise RuntimeError(
+            f'Trigger "{HEADCOUNT_TRIGGER}" is not installed on employees; '
+            "run `python manage_departments.py install` once after applying the schema"
+        )
+
+
+async def refresh_department_counts():
+    """Install the headcount trigger and rebuild counts from the employees table.
+
+    A one-off maintenance step (``manage_departments.py install``), not part of
+    startup: it runs DDL, needs to own `employees`, and briefly blocks writes.
+    The rebuild backfills existing data and corrects anything the trigger
+    cannot see, such as TRUNCATE.
+    """
+    db = get_prisma_client()
+    async with db.tx() as tx:
+        # Block employee writes until the trigger is in place and counts are rebuilt
+        await tx.execute_raw('LOCK TABLE "employees" IN SHARE MODE')
+        await install_department_trigger(tx)
+        await tx.execute_raw(
+            """
+            INSERT INTO "departments" ("name", "headcount", "updatedAt")
+            SELECT "department", COUNT(*), NOW() FROM "employees" GROUP BY "department"
+            ON CONFLICT ("name") DO UPDATE
+            SET "headcount" = EXCLUDED."headcount", "updatedAt" = EXCLUDED."updatedAt"
+            """
+        )
+        await tx.execute_raw(
+            """
+            UPDATE "departments" SET "headcount" = 0, "updatedAt" = NOW()
+            WHERE "headcount" <> 0
+              AND "name" NOT IN (SELECT DISTINCT "department" FROM "employees")
+            """
+        )
+    print("✅ Department counts refreshed")
@@ -38,6 +38,21 @@ class AttendanceResponse(AttendanceBase):
     class Config:
         from_attributes = True
 
+class AttendanceQueuedResponse(AttendanceBase):
+    """Returned when a mark is accepted by the write-behind buffer"""
+    queued: bool = True
+    queued_at: datetime
+
+class AttendanceBufferStats(BaseModel):
+    enabled: bool
+    pending: int = 0
+    flush_count: int = 0
+    failed_flush_count: int = 0
+    items_flushed: int = 0
+    last_flush_ms: float = 0.0
+    max_flush_ms: float = 0.0
+    avg_flush_ms: float = 0.0
+
 # Employee with stats (after AttendanceResponse is defined)
 class EmployeeWithStats(EmployeeResponse):
     total_present: int = 0
@@ -45,6 +60,14 @@ class EmployeeWithStats(EmployeeResponse):
     attendance_percentage: float = 0.0
     attendances: List[AttendanceResponse] = []
 
+# Department Schemas
+class DepartmentSummary(BaseModel):
+    name: str
+    headcount: int
+    present_today: int = 0
+    absent_today: int = 0
+    not_marked_today: int = 0
+
 # Dashboard Schemas
 class DashboardStats(BaseModel):
     total_employees: int
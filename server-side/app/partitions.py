@@ -0,0 +1,317 @@
+import csv
+import gzip
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from app.config import settings
+from app.database import get_prisma_client
+
+# Monthly partitions are named attendance_pYYYY_MM
+PARTITION_PATTERN = re.compile(r"^attendance_p(\d{4})_(\d{2})$")
+DEFAULT_PARTITION = "attendance_default"
+# Expired rows moved out of the default partition, waiting to be archived
+EXPIRED_PATTERN = re.compile(r"^attendance_expired_\d{8}_\d{6}$")
+
+# Copying a large table or moving stray rows can outlast Prisma's 5s default
+MAINTENANCE_TX_TIMEOUT = timedelta(minutes=30)
+
+ATTENDANCE_COLUMNS = '"id", "employeeId", "date", "status", "createdAt", "updatedAt"'
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+def add_months(value: date, months: int) -> date:
+    """Shift the first day of a month by a number of months"""
+    index = value.year * 12 + (value.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"attendance_p{month.year:04d}_{month.month:02d}"
+
+def parse_partition_name(name: str) -> Optional[date]:
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+async def is_partitioned() -> bool:
+    db = get_prisma_client()
+    row = await db.query_first(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = 'attendance'
+        ) AS partitioned
+        """
+    )
+    return bool(row and row["partitioned"])
+
+async def list_partitions() -> List[Tuple[str, date]]:
+    """Monthly partitions of the attendance table, oldest first"""
+    db = get_prisma_client()
+    rows = await db.query_raw(
+        """
+        SELECT c.relname::text AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'attendance'
+        """
+    )
+    partitions = []
+    for row in rows:
+        month = parse_partition_name(row["name"])
+        if month:
+            partitions.append((row["name"], month))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+async def setup_partitioning(months_ahead: Optional[int] = None) -> int:
+    """Convert the attendance table into a table range-partitioned by month.
+
+    Existing rows are copied into monthly partitions in one transaction.
+    Returns the number of partitions created.
+    """
+    if await is_partitioned():
+        print("ℹ️ attendance is already partitioned")
+        return 0
+
+    if months_ahead is None:
+        months_ahead = settings.attendance_partitions_ahead
+
+    db = get_prisma_client()
+    async with db.tx(timeout=MAINTENANCE_TX_TIMEOUT) as tx:
+        await tx.execute_raw('ALTER TABLE "attendance" RENAME TO "attendance_unpartitioned"')
+        # Free up index names so the new parent can reuse Prisma's names
+        await tx.execute_raw('ALTER TABLE "attendance_unpartitioned" RENAME CONSTRAINT "attendance_pkey" TO "attendance_unpartitioned_pkey"')
+        await tx.execute_raw('ALTER INDEX "attendance_employeeId_date_key" RENAME TO "attendance_unpartitioned_employeeId_date_key"')
+        await tx.execute_raw('DROP INDEX IF EXISTS "attendance_date_idx"')
+
+        await tx.execute_raw(
+            """
+            CREATE TABLE "attendance" (
+                "id" TEXT NOT NULL,
+                "employeeId" TEXT NOT NULL,
+                "date" TIMESTAMP(3) NOT NULL,
+                "status" TEXT NOT NULL,
+                "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                "updatedAt" TIMESTAMP(3) NOT NULL,
+                CONSTRAINT "attendance_pkey" PRIMARY KEY ("id", "date")
+            ) PARTITION BY RANGE ("date")
+            """
+        )
+        await tx.execute_raw('CREATE UNIQUE INDEX "attendance_employeeId_date_key" ON "attendance"("employeeId", "date")')
+        await tx.execute_raw('CREATE INDEX "attendance_date_idx" ON "attendance"("date")')
+        await tx.execute_raw(
+            """
+            ALTER TABLE "attendance" ADD CONSTRAINT "attendance_employeeId_fkey"
+            FOREIGN KEY ("employeeId") REFERENCES "employees"("id") ON DELETE CASCADE ON UPDATE CASCADE
+            """
+        )
+        # Catch-all so a missing future partition never rejects a write
+        await tx.execute_raw(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "attendance" DEFAULT')
+
+        row = await tx.query_first('SELECT MIN("date")::date::text AS first_date FROM "attendance_unpartitioned"')
+        first = date.fromisoformat(row["first_date"]) if row and row["first_date"] else date.today()
+
+        month = month_start(first)
+        last = add_months(month_start(date.today()), months_ahead)
+        created = 0
+        while month <= last:
+            await _create_partition(tx, month)
+            month = add_months(month, 1)
+            created += 1
+
+        await tx.execute_raw(
+            f'INSERT INTO "attendance" ({ATTENDANCE_COLUMNS}) '
+            f'SELECT {ATTENDANCE_COLUMNS} FROM "attendance_unpartitioned"'
+        )
+        await tx.execute_raw('DROP TABLE "attendance_unpartitioned"')
+
+    print(f"✅ attendance partitioned by month ({created} partitions)")
+    return created
+
+
+async def create_future_partitions(months_ahead: Optional[int] = None) -> List[str]:
+    """Make sure partitions exist from the current month to `months_ahead` months out"""
+    if months_ahead is None:
+        months_ahead = settings.attendance_partitions_ahead
+
+    existing = {month for _, month in await list_partitions()}
+    db = get_prisma_client()
+    created = []
+
+    month = month_start(date.today())
+    last = add_months(month, months_ahead)
+    while month <= last:
+        if month not in existing:
+            async with db.tx(timeout=MAINTENANCE_TX_TIMEOUT) as tx:
+                await _create_partition(tx, month)
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+
+    return created
+
+
+async def _create_partition(client, month: date):
+    """Create one monthly partition, moving any matching rows out of the default partition"""
+    name = partition_name(month)
+    start = month.isoformat()
+    end = add_months(month, 1).isoformat()
+
+    row = await client.query_first(
+        f'SELECT COUNT(*)::int AS count FROM "{DEFAULT_PARTITION}" '
+        f"WHERE \"date\" >= '{start}' AND \"date\" < '{end}'"
+    )
+    stray_rows = row["count"] if row else 0
+
+    if not stray_rows:
+        await client.execute_raw(
+            f'CREATE TABLE "{name}" PARTITION OF "attendance" '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        )
+        return
+
+    # Postgres refuses to add a partition whose range already has rows in the default
+    await client.execute_raw(f'ALTER TABLE "attendance" DETACH PARTITION "{DEFAULT_PARTITION}"')
+    await client.execute_raw(
+        f'CREATE TABLE "{name}" PARTITION OF "attendance" '
+        f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    await client.execute_raw(
+        f'INSERT INTO "attendance" ({ATTENDANCE_COLUMNS}) '
+        f'SELECT {ATTENDANCE_COLUMNS} FROM "{DEFAULT_PARTITION}" '
+        f"WHERE \"date\" >= '{start}' AND \"date\" < '{end}'"
+    )
+    await client.execute_raw(
+        f'DELETE FROM "{DEFAULT_PARTITION}" '
+        f"WHERE \"date\" >= '{start}' AND \"date\" < '{end}'"
+    )
+    await client.execute_raw(f'ALTER TABLE "attendance" ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT')
+
+
+async def list_detached_tables() -> List[str]:
+    """Detached monthly partitions and expired-row tables still waiting to be archived"""
+    db = get_prisma_client()
+    rows = await db.query_raw(
+        """
+        SELECT c.relname::text AS name
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r'
+          AND NOT c.relispartition
+          AND n.nspname = current_schema()
+        """
+    )
+    return sorted(
+        row["name"] for row in rows
+        if PARTITION_PATTERN.match(row["name"]) or EXPIRED_PATTERN.match(row["name"])
+    )
+
+
+async def archive_expired_partitions(
+    retention_months: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    drop_only: bool = False
+) -> List[str]:
+    """Archive attendance older than the retention window to gzipped CSV, then drop it.
+
+    Expired monthly partitions are detached first so no write can reach them
+    while they are archived. Expired rows in the default partition (including
+    any written to those months after the detach) are moved to a standalone
+    ``attendance_expired_*`` table and archived the same way. Tables left
+    behind by an interrupted run are picked up again. A retention of 0 keeps
+    everything.
+    """
+    if retention_months is None:
+        retention_months = settings.attendance_retention_months
+    if archive_dir is None:
+        archive_dir = settings.attendance_archive_dir
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(date.today()), -retention_months)
+    db = get_prisma_client()
+
+    for name, month in await list_partitions():
+        if month >= cutoff:
+            break
+        await db.execute_raw(f'ALTER TABLE "attendance" DETACH PARTITION "{name}"')
+
+    expired = f"attendance_expired_{datetime.now():%Y%m%d_%H%M%S}"
+    async with db.tx(timeout=MAINTENANCE_TX_TIMEOUT) as tx:
+        await tx.execute_raw(f'CREATE TABLE "{expired}" (LIKE "{DEFAULT_PARTITION}")')
+        # One statement, so every row deleted is exactly a row copied even
+        # while new writes for expired months keep landing in the default
+        moved = await tx.execute_raw(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+            f"WHERE \"date\" < '{cutoff.isoformat()}' RETURNING {ATTENDANCE_COLUMNS}) "
+            f'INSERT INTO "{expired}" ({ATTENDANCE_COLUMNS}) SELECT {ATTENDANCE_COLUMNS} FROM moved'
+        )
+        if not moved:
+            await tx.execute_raw(f'DROP TABLE "{expired}"')
+
+    removed = []
+    for name in await list_detached_tables():
+        month = parse_partition_name(name)
+        if month and month >= cutoff:
+            # Detached by hand and still inside the retention window; leave it alone
+            continue
+        if not drop_only:
+            await _archive_table(name, archive_dir)
+        await db.execute_raw(f'DROP TABLE "{name}"')
+        removed.append(name)
+
+    return removed
+
+
+async def _archive_table(name: str, archive_dir: str) -> str:
+    db = get_prisma_client()
+    rows = await db.query_raw(
+        f'SELECT "id", "employeeId", "date"::text AS "date", "status", '
+        f'"createdAt"::text AS "createdAt", "updatedAt"::text AS "updatedAt" '
+        f'FROM "{name}" ORDER BY "date", "employeeId"'
+    )
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    tmp_path = f"{path}.tmp"
+
+    with gzip.open(tmp_path, "wt", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "employeeId", "date", "status", "createdAt", "updatedAt"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    # Only publish the archive once it is fully on disk
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    print(f"📦 Archived {len(rows)} rows from {name} to {path}")
+    return path
+
+
+def filter_partition_statements(script: str) -> str:
+    """Drop statements that touch attendance partitions from a `prisma migrate diff` script.
+
+    Prisma does not model the child tables created by `setup` (or expired
+    tables waiting to be archived), so a diff against the live database
+    proposes dropping them. Everything else in the
+    script is kept as is.
+    """
+    partition_table = re.compile(r'"(attendance_p\d{4}_\d{2}|attendance_default|attendance_expired_\d{8}_\d{6})"')
+    kept = []
+    for statement in script.split(";"):
+        if partition_table.search(statement):
+            continue
+        sql = "\n".join(
+            line for line in statement.splitlines() if not line.strip().startswith("--")
+        ).strip()
+        if sql:
+            kept.append(statement.strip())
+    return "".join(f"{statement};\n\n" for statement in kept)
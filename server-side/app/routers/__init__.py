@@ -1 +1 @@
-from . import employees, attendance, dashboard
+from . import employees, attendance, dashboard, departments
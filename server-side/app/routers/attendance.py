@@ -1,77 +1,92 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from app.database import get_prisma_client
-db = get_prisma_client()
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from app.database import get_db, get_read_db
+from app.attendance_buffer import get_attendance_buffer
+from prisma import Prisma
+from prisma.errors import ForeignKeyViolationError
 from app.models.schemas import (
     AttendanceCreate,
     AttendanceResponse,
+    AttendanceQueuedResponse,
+    AttendanceBufferStats,
     EmployeeResponse,
     SuccessResponse
 )
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import date, datetime
 
 router = APIRouter(prefix="/api/attendance", tags=["Attendance"])
 
-@router.post("/", response_model=AttendanceResponse, status_code=status.HTTP_201_CREATED)
-async def mark_attendance(attendance: AttendanceCreate):
+@router.post(
+    "/",
+    response_model=Union[AttendanceResponse, AttendanceQueuedResponse],
+    status_code=status.HTTP_201_CREATED
+)
+async def mark_attendance(
+    attendance: AttendanceCreate,
+    response: Response,
+    db: Prisma = Depends(get_db)
+):
     """Mark attendance for an employee"""
     try:
-        # Check if employee exists
-        employee = await db.employee.find_unique(where={"id": attendance.employee_id})
-        
-        if not employee:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Employee not found"
+        # Write-behind mode: acknowledge once queued, the buffer upserts in batches
+        buffer = get_attendance_buffer()
+        if buffer:
+            # Check if employee exists before acknowledging
+            employee = await db.employee.find_unique(where={"id": attendance.employee_id})
+            
+            if not employee:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Employee not found"
+                )
+            
+            await buffer.enqueue(attendance.employee_id, attendance.date, attendance.status)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return AttendanceQueuedResponse(
+                employee_id=attendance.employee_id,
+                date=attendance.date,
+                status=attendance.status,
+                queued_at=datetime.utcnow()
             )
         
         # Convert date to datetime for Prisma
         attendance_date = datetime.combine(attendance.date, datetime.min.time())
         
-        # Check if attendance already exists for this date
-        existing = await db.attendance.find_first(
+        # Create or update in one atomic statement on the (employeeId, date) key;
+        # a missing employee surfaces as a foreign key violation
+        record = await db.attendance.upsert(
             where={
-                "employeeId": attendance.employee_id,
-                "date": attendance_date
-            }
-        )
-        
-        if existing:
-            # Update existing attendance
-            updated = await db.attendance.update(
-                where={"id": existing.id},
-                data={"status": attendance.status}
-            )
-            
-            return AttendanceResponse(
-                id=updated.id,
-                employee_id=updated.employeeId,
-                date=updated.date.date(),
-                status=updated.status,
-                created_at=updated.createdAt,
-                updated_at=updated.updatedAt
-            )
-        else:
-            # Create new attendance
-            new_attendance = await db.attendance.create(
-                data={
+                "employeeId_date": {
+                    "employeeId": attendance.employee_id,
+                    "date": attendance_date
+                }
+            },
+            data={
+                "create": {
                     "employeeId": attendance.employee_id,
                     "date": attendance_date,
                     "status": attendance.status
-                }
-            )
-            
-            return AttendanceResponse(
-                id=new_attendance.id,
-                employee_id=new_attendance.employeeId,
-                date=new_attendance.date.date(),
-                status=new_attendance.status,
-                created_at=new_attendance.createdAt,
-                updated_at=new_attendance.updatedAt
-            )
+                },
+                "update": {"status": attendance.status}
+            }
+        )
+        
+        return AttendanceResponse(
+            id=record.id,
+            employee_id=record.employeeId,
+            date=record.date.date(),
+            status=record.status,
+            created_at=record.createdAt,
+            updated_at=record.updatedAt
+        )
         
     except HTTPException:
         raise
+    except ForeignKeyViolationError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Employee not found"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -84,7 +99,8 @@ async def get_attendance_records(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     status: Optional[str] = Query(None),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    read_db: Prisma = Depends(get_read_db)
 ):
     """Get attendance records with filters"""
     try:
@@ -106,7 +122,7 @@ async def get_attendance_records(
         if status:
             where_clause["status"] = status.upper()
         
-        records = await db.attendance.find_many(
+        records = await read_db.attendance.find_many(
             where=where_clause if where_clause else None,
             include={"employee": True},
             order={"date": "desc"},
@@ -140,11 +156,20 @@ async def get_attendance_records(
             detail=f"Error fetching attendance records: {str(e)}"
         )
 
+@router.get("/buffer/stats", response_model=AttendanceBufferStats)
+async def get_buffer_stats():
+    """Get write-behind buffer queue depth and flush latency metrics"""
+    buffer = get_attendance_buffer()
+    if not buffer:
+        return AttendanceBufferStats(enabled=False)
+    return AttendanceBufferStats(**buffer.stats())
+
 @router.get("/{attendance_id}", response_model=AttendanceResponse)
-async def get_attendance(attendance_id: str):
+async def get_attendance(attendance_id: str, read_db: Prisma = Depends(get_read_db)):
     """Get single attendance record"""
     try:
-        record = await db.attendance.find_unique(
+        # The primary key is (id, date) so look up by id alone with find_first
+        record = await read_db.attendance.find_first(
             where={"id": attendance_id},
             include={"employee": True}
         )
@@ -182,19 +207,18 @@ async def get_attendance(attendance_id: str):
         )
 
 @router.delete("/{attendance_id}", response_model=SuccessResponse)
-async def delete_attendance(attendance_id: str):
+async def delete_attendance(attendance_id: str, db: Prisma = Depends(get_db)):
     """Delete an attendance record"""
     try:
-        record = await db.attendance.find_unique(where={"id": attendance_id})
+        # Single round-trip: the delete count tells us whether the record existed
+        deleted = await db.attendance.delete_many(where={"id": attendance_id})
         
-        if not record:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Attendance record not found"
             )
         
-        await db.attendance.delete(where={"id": attendance_id})
-        
         return SuccessResponse(
             success=True,
             message="Attendance record deleted successfully"
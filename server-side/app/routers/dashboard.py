@@ -1,38 +1,28 @@
-from fastapi import APIRouter, HTTPException, status
-from app.database import get_prisma_client
-db = get_prisma_client()
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.database import get_read_db
+from app.departments import get_department_directory
 from app.models.schemas import DashboardStats, EmployeeResponse
 from datetime import date, datetime
 from typing import List
+from prisma import Prisma
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
 @router.get("/stats", response_model=DashboardStats)
-async def get_dashboard_stats():
+async def get_dashboard_stats(read_db: Prisma = Depends(get_read_db)):
     """Get dashboard statistics"""
     try:
-        # Total employees
-        total_employees = await db.employee.count()
+        # One query over the maintained department counts covers every stat
+        directory = await get_department_directory(read_db, date.today())
         
-        # Today's attendance
-        today = date.today()
-        # Convert to datetime at midnight to match storage format
-        today_datetime = datetime.combine(today, datetime.min.time())
-        
-        today_attendance = await db.attendance.find_many(
-            where={"date": today_datetime}
-        )
-        
-        present_today = sum(1 for att in today_attendance if att.status == "PRESENT")
-        absent_today = sum(1 for att in today_attendance if att.status == "ABSENT")
+        total_employees = sum(dept.headcount for dept in directory)
+        present_today = sum(dept.present_today for dept in directory)
+        absent_today = sum(dept.absent_today for dept in directory)
         
         # Calculate not marked (Total - Marked)
         not_marked_attendance = total_employees - (present_today + absent_today)
         
-        # Total departments (unique count)
-        employees = await db.employee.find_many()
-        departments = set(emp.department for emp in employees)
-        total_departments = len(departments)
+        total_departments = len(directory)
         
         return DashboardStats(
             total_employees=total_employees,
@@ -49,17 +39,17 @@ async def get_dashboard_stats():
         )
 
 @router.get("/not-marked", response_model=List[EmployeeResponse])
-async def get_not_marked_employees():
+async def get_not_marked_employees(read_db: Prisma = Depends(get_read_db)):
     """Get list of employees who haven't marked attendance today"""
     try:
         from app.models.schemas import EmployeeResponse
         
         today = date.today()
         # Get all employees
-        all_employees = await db.employee.find_many()
+        all_employees = await read_db.employee.find_many()
         
         # Get employees who have marked attendance today
-        today_attendance = await db.attendance.find_many(
+        today_attendance = await read_db.attendance.find_many(
             where={
                 "date": datetime.combine(today, datetime.min.time())
             }
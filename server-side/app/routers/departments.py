@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.database import get_read_db
+from app.departments import get_department_directory
+from app.models.schemas import DepartmentSummary
+from datetime import date
+from typing import List
+from prisma import Prisma
+
+router = APIRouter(prefix="/api/departments", tags=["Departments"])
+
+@router.get("/", response_model=List[DepartmentSummary])
+async def get_departments(read_db: Prisma = Depends(get_read_db)):
+    """Get departments with headcount and today's attendance counts"""
+    try:
+        return await get_department_directory(read_db, date.today())
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching departments: {str(e)}"
+        )
@@ -1,6 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from app.database import get_prisma_client
-db = get_prisma_client()
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.database import get_db, get_read_db, get_transaction
 from app.models.schemas import (
     EmployeeCreate, 
     EmployeeResponse, 
@@ -9,16 +8,22 @@ from app.models.schemas import (
     AttendanceResponse
 )
 from typing import List, Optional
+from prisma import Prisma
 from prisma.errors import UniqueViolationError
 
 router = APIRouter(prefix="/api/employees", tags=["Employees"])
 
 @router.post("/", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
-async def create_employee(employee: EmployeeCreate):
+async def create_employee(
+    employee: EmployeeCreate,
+    # Duplicate check and insert run in one transaction, committed before the
+    # response is sent; the department headcount is maintained by a trigger
+    tx: Prisma = Depends(get_transaction(), scope="function")
+):
     """Create a new employee"""
     try:
         # Check if employee ID or email already exists
-        existing = await db.employee.find_first(
+        existing = await tx.employee.find_first(
             where={
                 "OR": [
                     {"employeeId": employee.employee_id},
@@ -39,8 +44,7 @@ async def create_employee(employee: EmployeeCreate):
                     detail="Email already exists"
                 )
         
-        # Create employee
-        new_employee = await db.employee.create(
+        new_employee = await tx.employee.create(
             data={
                 "employeeId": employee.employee_id,
                 "fullName": employee.full_name,
@@ -61,6 +65,12 @@ async def create_employee(employee: EmployeeCreate):
         
     except HTTPException:
         raise
+    except UniqueViolationError:
+        # A concurrent request created the same employee ID or email
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Employee ID or email already exists"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -70,7 +80,8 @@ async def create_employee(employee: EmployeeCreate):
 @router.get("/", response_model=List[EmployeeResponse])
 async def get_employees(
     department: Optional[str] = Query(None),
-    search: Optional[str] = Query(None)
+    search: Optional[str] = Query(None),
+    read_db: Prisma = Depends(get_read_db)
 ):
     """Get all employees with optional filters"""
     try:
@@ -86,7 +97,7 @@ async def get_employees(
                 {"email": {"contains": search, "mode": "insensitive"}}
             ]
         
-        employees = await db.employee.find_many(
+        employees = await read_db.employee.find_many(
             where=where_clause if where_clause else None,
             order={"createdAt": "desc"}
         )
@@ -111,10 +122,10 @@ async def get_employees(
         )
 
 @router.get("/{employee_id}", response_model=EmployeeResponse)
-async def get_employee(employee_id: str):
+async def get_employee(employee_id: str, read_db: Prisma = Depends(get_read_db)):
     """Get a single employee by ID"""
     try:
-        employee = await db.employee.find_unique(where={"id": employee_id})
+        employee = await read_db.employee.find_unique(where={"id": employee_id})
         
         if not employee:
             raise HTTPException(
@@ -141,10 +152,11 @@ async def get_employee(employee_id: str):
         )
 
 @router.delete("/{employee_id}", response_model=SuccessResponse)
-async def delete_employee(employee_id: str):
+async def delete_employee(employee_id: str, db: Prisma = Depends(get_db)):
     """Delete an employee"""
     try:
-        employee = await db.employee.find_unique(where={"id": employee_id})
+        # Single round-trip: delete returns None if the employee does not exist
+        employee = await db.employee.delete(where={"id": employee_id})
         
         if not employee:
             raise HTTPException(
@@ -152,8 +164,6 @@ async def delete_employee(employee_id: str):
                 detail="Employee not found"
             )
         
-        await db.employee.delete(where={"id": employee_id})
-        
         return SuccessResponse(
             success=True,
             message="Employee deleted successfully"
@@ -168,10 +178,10 @@ async def delete_employee(employee_id: str):
         )
 
 @router.get("/{employee_id}/attendance", response_model=EmployeeWithStats)
-async def get_employee_attendance(employee_id: str):
+async def get_employee_attendance(employee_id: str, read_db: Prisma = Depends(get_read_db)):
     """Get employee with attendance statistics"""
     try:
-        employee = await db.employee.find_unique(
+        employee = await read_db.employee.find_unique(
             where={"id": employee_id},
             include={"attendances": True}
         )
@@ -219,8 +229,9 @@ async def get_employee_attendance(employee_id: str):
         )
 
 @router.get("/suggest/next-id")
-async def suggest_next_employee_id():
+async def suggest_next_employee_id(db: Prisma = Depends(get_db)):
     """Suggest next available employee ID"""
+    # Stays on the primary: a lagging replica could suggest an ID that was just taken
     try:
         last_employee = await db.employee.find_first(
             order={"employeeId": "desc"}
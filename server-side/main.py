@@ -2,8 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.database import connect_db, disconnect_db
-from app.routers import employees, attendance, dashboard
+from app.database import connect_db, disconnect_db, get_prisma_client, read_routing_middleware
+from app.attendance_buffer import get_attendance_buffer
+from app.departments import require_department_trigger
+from app.routers import employees, attendance, dashboard, departments
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -31,9 +33,22 @@ async def lifespan(app: FastAPI):
         await connect_db()
     except Exception as e:
         print(f"❌ Failed to connect to database: {e}")
+    
+    # 4. Headcounts depend on a trigger installed by `manage_departments.py install`;
+    #    refuse to serve wrong counts if it is missing
+    if get_prisma_client().is_connected():
+        await require_department_trigger()
+    
+    # 5. Start attendance write-behind buffer (if enabled).
+    #    Replayed marks are flushed by its loop, so a missing database is tolerated here.
+    buffer = get_attendance_buffer()
+    if buffer:
+        await buffer.start()
         
     yield
-    # Shutdown
+    # Shutdown: flush queued attendance marks before closing the connection
+    if buffer:
+        await buffer.stop()
     await disconnect_db()
 
 app = FastAPI(
@@ -50,12 +65,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the browser client see how long to read from the primary after a write
+    expose_headers=["X-Read-Primary-For"],
 )
 
+# Read-your-writes routing between primary and read replicas
+app.middleware("http")(read_routing_middleware)
+
 # Include Routers
 app.include_router(employees.router)
 app.include_router(attendance.router)
 app.include_router(dashboard.router)
+app.include_router(departments.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,51 @@
+"""Department headcount maintenance.
+
+Usage:
+    python manage_departments.py install    # install the headcount trigger and rebuild counts
+    python manage_departments.py check      # exit non-zero if the trigger is missing
+
+Run `install` once after `prisma db push` (or `manage_partitions.py schema-diff
+--apply`) with a role that owns the employees table. It is idempotent, so it is
+also the way to reconcile counts after a TRUNCATE or a bulk load with triggers
+disabled.
+"""
+import argparse
+import asyncio
+import sys
+
+from app.database import connect_db, disconnect_db, get_prisma_client
+from app.departments import HEADCOUNT_TRIGGER, department_trigger_installed, refresh_department_counts
+
+
+async def install(args):
+    await refresh_department_counts()
+
+
+async def check(args):
+    if not await department_trigger_installed(get_prisma_client()):
+        print(f'❌ Trigger "{HEADCOUNT_TRIGGER}" is missing; run `python manage_departments.py install`')
+        sys.exit(1)
+    print(f'✅ Trigger "{HEADCOUNT_TRIGGER}" is installed')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Department headcount maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    install_parser = subparsers.add_parser("install", help="Install the headcount trigger and rebuild counts")
+    install_parser.set_defaults(handler=install)
+
+    check_parser = subparsers.add_parser("check", help="Check that the headcount trigger is installed")
+    check_parser.set_defaults(handler=check)
+
+    args = parser.parse_args()
+
+    await connect_db()
+    try:
+        await args.handler(args)
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,210 @@
+"""Attendance partition maintenance.
+
+Usage:
+    python manage_partitions.py setup                # convert attendance to monthly partitions
+    python manage_partitions.py maintain             # create future partitions, archive expired ones
+    python manage_partitions.py benchmark --years 5  # compare range queries on flat vs partitioned tables
+    python manage_partitions.py schema-diff [--apply] # schema changes after partitioning
+
+Run `maintain` from cron (e.g. daily) so partitions always exist ahead of time.
+
+Once attendance is partitioned, do not use `prisma db push`: Prisma does not
+model the partitions and would try to drop them. Use `schema-diff` instead.
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date
+
+from app.config import settings
+from app.database import connect_db, disconnect_db, get_prisma_client
+from app.partitions import (
+    add_months,
+    archive_expired_partitions,
+    create_future_partitions,
+    filter_partition_statements,
+    month_start,
+    setup_partitioning,
+)
+
+BENCH_FLAT = "bench_attendance_flat"
+BENCH_PARTITIONED = "bench_attendance_partitioned"
+
+
+async def setup(args):
+    await setup_partitioning(months_ahead=args.ahead)
+
+
+async def maintain(args):
+    created = await create_future_partitions(months_ahead=args.ahead)
+    for name in created:
+        print(f"✅ Created partition {name}")
+
+    removed = await archive_expired_partitions(
+        retention_months=args.retention_months,
+        archive_dir=args.archive_dir,
+        drop_only=args.drop_only
+    )
+    for name in removed:
+        print(f"🗑️ Dropped partition {name}")
+
+    if not created and not removed:
+        print("ℹ️ Partitions are up to date")
+
+
+async def benchmark(args):
+    """Load synthetic multi-year data into scratch tables and time range queries.
+
+    The scratch tables are dropped afterwards; the real attendance table is untouched.
+    """
+    db = get_prisma_client()
+    first_month = add_months(month_start(date.today()), -12 * args.years)
+    end_month = add_months(month_start(date.today()), 1)
+
+    await _drop_bench_tables(db)
+    await db.execute_raw(
+        f'CREATE TABLE "{BENCH_FLAT}" ("employeeId" TEXT NOT NULL, "date" TIMESTAMP(3) NOT NULL, '
+        f'"status" TEXT NOT NULL, PRIMARY KEY ("employeeId", "date"))'
+    )
+    await db.execute_raw(
+        f'CREATE TABLE "{BENCH_PARTITIONED}" ("employeeId" TEXT NOT NULL, "date" TIMESTAMP(3) NOT NULL, '
+        f'"status" TEXT NOT NULL, PRIMARY KEY ("employeeId", "date")) PARTITION BY RANGE ("date")'
+    )
+    month = first_month
+    while month < end_month:
+        await db.execute_raw(
+            f'CREATE TABLE "{BENCH_PARTITIONED}_p{month.year:04d}_{month.month:02d}" '
+            f'PARTITION OF "{BENCH_PARTITIONED}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    try:
+        for table in (BENCH_FLAT, BENCH_PARTITIONED):
+            started = time.perf_counter()
+            # Weekdays only, one row per employee per working day
+            await db.execute_raw(
+                f'INSERT INTO "{table}" ("employeeId", "date", "status") '
+                f"SELECT 'EMP' || e, d, CASE WHEN random() < 0.9 THEN 'PRESENT' ELSE 'ABSENT' END "
+                f"FROM generate_series(1, {args.employees}) AS e, "
+                f"generate_series('{first_month.isoformat()}'::timestamp, "
+                f"'{end_month.isoformat()}'::timestamp - interval '1 day', interval '1 day') AS d "
+                f"WHERE extract(isodow FROM d) < 6"
+            )
+            await db.execute_raw(f'CREATE INDEX ON "{table}" ("date")')
+            await db.execute_raw(f'ANALYZE "{table}"')
+            print(f"📥 Loaded {table} in {time.perf_counter() - started:.1f}s")
+
+        row = await db.query_first(f'SELECT COUNT(*)::int AS count FROM "{BENCH_FLAT}"')
+        print(f"ℹ️ {row['count']:,} rows over {args.years} years, {args.employees} employees")
+
+        # Ranges that fall inside one month and ones that straddle partition boundaries
+        last_month = add_months(end_month, -1)
+        ranges = {
+            "one month": (last_month, add_months(last_month, 1)),
+            "mid-month to mid-month": (add_months(last_month, -1).replace(day=15), last_month.replace(day=15)),
+            "one quarter": (add_months(last_month, -2), add_months(last_month, 1)),
+            "year boundary": (date(last_month.year - 1, 12, 20), date(last_month.year, 1, 10)),
+        }
+
+        print(f"\n{'range':<24}{'flat ms':>10}{'partitioned ms':>16}  rows")
+        for label, (start, end) in ranges.items():
+            timings = {}
+            counts = {}
+            for table in (BENCH_FLAT, BENCH_PARTITIONED):
+                samples = []
+                for _ in range(args.runs):
+                    started = time.perf_counter()
+                    row = await db.query_first(
+                        f'SELECT COUNT(*)::int AS count, '
+                        f"COUNT(*) FILTER (WHERE \"status\" = 'PRESENT')::int AS present "
+                        f'FROM "{table}" '
+                        f"WHERE \"date\" >= '{start.isoformat()}' AND \"date\" < '{end.isoformat()}'"
+                    )
+                    samples.append((time.perf_counter() - started) * 1000)
+                timings[table] = statistics.median(samples)
+                counts[table] = (row["count"], row["present"])
+
+            # Both layouts must return identical results across partition boundaries
+            if counts[BENCH_FLAT] != counts[BENCH_PARTITIONED]:
+                raise RuntimeError(f"Result mismatch for {label}: {counts}")
+
+            print(
+                f"{label:<24}{timings[BENCH_FLAT]:>10.2f}{timings[BENCH_PARTITIONED]:>16.2f}"
+                f"  {counts[BENCH_FLAT][0]:,}"
+            )
+    finally:
+        await _drop_bench_tables(db)
+
+
+async def schema_diff(args):
+    """Print (or apply) the SQL that brings the database in line with schema.prisma,
+    minus any statement touching attendance partitions."""
+    diff = subprocess.run(
+        [
+            sys.executable, "-m", "prisma", "migrate", "diff",
+            "--from-schema-datasource", "prisma/schema.prisma",
+            "--to-schema-datamodel", "prisma/schema.prisma",
+            "--script"
+        ],
+        capture_output=True, text=True, check=True
+    )
+    script = filter_partition_statements(diff.stdout)
+
+    if not script:
+        print("ℹ️ Database already matches schema.prisma")
+        return
+
+    print(script)
+    if args.apply:
+        subprocess.run(
+            [sys.executable, "-m", "prisma", "db", "execute", "--stdin", "--schema", "prisma/schema.prisma"],
+            input=script, text=True, check=True
+        )
+        print("✅ Schema changes applied")
+
+
+async def _drop_bench_tables(db):
+    await db.execute_raw(f'DROP TABLE IF EXISTS "{BENCH_FLAT}"')
+    await db.execute_raw(f'DROP TABLE IF EXISTS "{BENCH_PARTITIONED}" CASCADE')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Attendance partition maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    setup_parser = subparsers.add_parser("setup", help="Convert attendance to a monthly partitioned table")
+    setup_parser.add_argument("--ahead", type=int, default=settings.attendance_partitions_ahead)
+    setup_parser.set_defaults(handler=setup)
+
+    maintain_parser = subparsers.add_parser("maintain", help="Create future partitions and archive expired ones")
+    maintain_parser.add_argument("--ahead", type=int, default=settings.attendance_partitions_ahead)
+    maintain_parser.add_argument("--retention-months", type=int, default=settings.attendance_retention_months)
+    maintain_parser.add_argument("--archive-dir", default=settings.attendance_archive_dir)
+    maintain_parser.add_argument("--drop-only", action="store_true", help="Drop expired partitions without archiving")
+    maintain_parser.set_defaults(handler=maintain)
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="Time range queries on flat vs partitioned tables")
+    benchmark_parser.add_argument("--years", type=int, default=5)
+    benchmark_parser.add_argument("--employees", type=int, default=1000)
+    benchmark_parser.add_argument("--runs", type=int, default=5)
+    benchmark_parser.set_defaults(handler=benchmark)
+
+    schema_parser = subparsers.add_parser("schema-diff", help="Schema changes that leave partitions alone")
+    schema_parser.add_argument("--apply", action="store_true", help="Execute the SQL instead of only printing it")
+    schema_parser.set_defaults(handler=schema_diff)
+
+    args = parser.parse_args()
+
+    await connect_db()
+    try:
+        await args.handler(args)
+    finally:
+        await disconnect_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import os
+from datetime import date
+
+import pytest
+
+from app import attendance_buffer
+from app.attendance_buffer import AttendanceWriteBuffer
+
+DAY = date(2026, 3, 2)
+
+
+class FakeDatabase:
+    """Just enough of the Prisma client for the buffer's writes"""
+
+    def __init__(self, employees=("emp-1", "emp-2")):
+        self.employees = set(employees)
+        self.rows = {}
+        self.down = False
+        # Seconds a batch commit takes, to catch the buffer mid-flush
+        self.commit_delay = 0
+        self.attendance = FakeAttendanceActions(self)
+        self.employee = FakeEmployeeActions(self)
+
+    def check(self):
+        if self.down:
+            raise ConnectionError("database unreachable")
+
+    def upsert(self, where, data):
+        self.check()
+        key = where["employeeId_date"]
+        if key["employeeId"] not in self.employees:
+            raise ValueError("foreign key violation")
+        self.rows[(key["employeeId"], key["date"].date())] = data["update"]["status"]
+
+    def batch_(self):
+        return FakeBatch(self)
+
+
+class FakeAttendanceActions:
+    def __init__(self, database):
+        self.database = database
+
+    async def upsert(self, where, data):
+        self.database.upsert(where, data)
+
+
+class FakeEmployeeActions:
+    def __init__(self, database):
+        self.database = database
+
+    async def find_unique(self, where):
+        self.database.check()
+        return object() if where["id"] in self.database.employees else None
+
+
+class FakeBatch:
+    def __init__(self, database):
+        self.database = database
+        self.upserts = []
+        self.attendance = self
+
+    def upsert(self, where, data):
+        self.upserts.append((where, data))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc is not None:
+            return
+        await asyncio.sleep(self.database.commit_delay)
+        # All or nothing, like a Prisma batch transaction
+        self.database.check()
+        for where, data in self.upserts:
+            if where["employeeId_date"]["employeeId"] not in self.database.employees:
+                raise ValueError("foreign key violation")
+        for where, data in self.upserts:
+            self.database.upsert(where, data)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(attendance_buffer, "get_prisma_client", lambda: database)
+    return database
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_flush_deduplicates_last_write_wins(database):
+    async def scenario():
+        buffer = AttendanceWriteBuffer()
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        await buffer.enqueue("emp-1", DAY, "ABSENT")
+        await buffer.enqueue("emp-2", DAY, "PRESENT")
+        assert buffer.pending_count() == 2
+        assert await buffer.flush() == 2
+
+    asyncio.run(scenario())
+    assert database.rows == {("emp-1", DAY): "ABSENT", ("emp-2", DAY): "PRESENT"}
+
+
+def test_missing_employee_is_dropped_not_retried(database):
+    async def scenario():
+        buffer = AttendanceWriteBuffer()
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        await buffer.enqueue("deleted", DAY, "PRESENT")
+        assert await buffer.flush() == 1
+        assert buffer.pending_count() == 0
+
+    asyncio.run(scenario())
+    assert database.rows == {("emp-1", DAY): "PRESENT"}
+
+
+def test_database_outage_keeps_marks_queued_and_logged(database, tmp_path):
+    log_path = str(tmp_path / "attendance.log")
+
+    async def scenario():
+        buffer = AttendanceWriteBuffer(flush_interval_ms=10_000, log_path=log_path)
+        await buffer.start()
+
+        database.down = True
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        assert await buffer.flush() == 0
+        assert buffer.pending_count() == 1
+
+        # A second failed flush must append to, not overwrite, the .flushing log
+        await buffer.enqueue("emp-2", DAY, "ABSENT")
+        await buffer.enqueue("emp-1", DAY, "ABSENT")
+        assert await buffer.flush() == 0
+        entries = read_log(f"{log_path}.flushing")
+        assert [(e["employee_id"], e["status"]) for e in entries] == [
+            ("emp-1", "PRESENT"), ("emp-2", "ABSENT"), ("emp-1", "ABSENT")
+        ]
+
+        database.down = False
+        assert await buffer.flush() == 2
+        assert not os.path.exists(f"{log_path}.flushing")
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    # The newer mark queued during the outage wins over the re-queued one
+    assert database.rows == {("emp-1", DAY): "ABSENT", ("emp-2", DAY): "ABSENT"}
+
+
+def test_restart_replays_log_without_database(database, tmp_path):
+    log_path = str(tmp_path / "attendance.log")
+
+    async def crash():
+        buffer = AttendanceWriteBuffer(flush_interval_ms=10_000, log_path=log_path)
+        await buffer.start()
+        database.down = True
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        await buffer.flush()
+        await buffer.enqueue("emp-2", DAY, "PRESENT")
+        # Simulate a crash: drop the process lock without flushing
+        buffer._task.cancel()
+        if buffer._lock_file:
+            buffer._lock_file.close()
+
+    async def restart():
+        buffer = AttendanceWriteBuffer(flush_interval_ms=10, log_path=log_path)
+        # Startup must not fail while the database is still down
+        await buffer.start()
+        assert buffer.pending_count() == 2
+
+        database.down = False
+        for _ in range(100):
+            if not buffer.pending_count():
+                break
+            await asyncio.sleep(0.01)
+        await buffer.stop()
+
+    asyncio.run(crash())
+    asyncio.run(restart())
+    assert database.rows == {("emp-1", DAY): "PRESENT", ("emp-2", DAY): "PRESENT"}
+
+
+def test_flush_loop_survives_errors(database, monkeypatch):
+    async def scenario():
+        buffer = AttendanceWriteBuffer(flush_interval_ms=10)
+        real_flush = buffer.flush
+        calls = []
+
+        async def flaky_flush():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("boom")
+            return await real_flush()
+
+        monkeypatch.setattr(buffer, "flush", flaky_flush)
+        await buffer.start()
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        await asyncio.sleep(0.1)
+
+        assert len(calls) > 1
+        assert not buffer._task.done()
+        await buffer.stop()
+
+    asyncio.run(scenario())
+    assert database.rows == {("emp-1", DAY): "PRESENT"}
+
+
+def test_stop_during_flush_does_not_lose_marks(database):
+    async def scenario():
+        database.commit_delay = 0.05
+        buffer = AttendanceWriteBuffer(flush_interval_ms=1)
+        await buffer.start()
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        while not buffer._flush_lock.locked():
+            await asyncio.sleep(0)
+
+        await buffer.stop()
+        assert buffer.pending_count() == 0
+
+    asyncio.run(scenario())
+    assert database.rows == {("emp-1", DAY): "PRESENT"}
+
+
+def test_cancelled_flush_requeues_batch(database):
+    async def scenario():
+        database.commit_delay = 10
+        buffer = AttendanceWriteBuffer()
+        await buffer.enqueue("emp-1", DAY, "PRESENT")
+        flush = asyncio.create_task(buffer.flush())
+        while not buffer._flush_lock.locked():
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+        assert buffer.pending_count() == 1
+
+        database.commit_delay = 0
+        assert await buffer.flush() == 1
+
+    asyncio.run(scenario())
+    assert database.rows == {("emp-1", DAY): "PRESENT"}
+
+
+@pytest.mark.skipif(attendance_buffer.fcntl is None, reason="file locking needs fcntl")
+def test_log_path_is_single_worker(database, tmp_path):
+    log_path = str(tmp_path / "attendance.log")
+
+    async def scenario():
+        first = AttendanceWriteBuffer(log_path=log_path)
+        await first.start()
+        second = AttendanceWriteBuffer(log_path=log_path)
+        with pytest.raises(RuntimeError, match="single worker"):
+            await second.start()
+        await first.stop()
+
+    asyncio.run(scenario())
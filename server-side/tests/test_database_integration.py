@@ -0,0 +1,98 @@
+"""Tests against a real Postgres database.
+
+Skipped unless DATABASE_URL is set and the Prisma client has been generated.
+They create and delete their own employees in a throwaway department.
+"""
+import asyncio
+import os
+import uuid
+
+import httpx
+import pytest
+
+from app.database import connect_db, disconnect_db, get_prisma_client, transaction
+
+
+def prisma_client_generated() -> bool:
+    try:
+        from prisma import Prisma  # noqa: F401
+    except RuntimeError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(
+    not (os.environ.get("DATABASE_URL") and prisma_client_generated()),
+    reason="needs DATABASE_URL and a generated Prisma client"
+)
+
+
+def run(scenario):
+    async def connected():
+        await connect_db()
+        try:
+            return await scenario()
+        finally:
+            await disconnect_db()
+    return asyncio.run(connected())
+
+
+@pytest.mark.parametrize("isolation", ["READ COMMITTED", "REPEATABLE READ", "SERIALIZABLE"])
+def test_isolation_level_takes_effect_inside_transaction(isolation):
+    async def scenario():
+        async with transaction(isolation=isolation) as tx:
+            row = await tx.query_first("SHOW transaction_isolation")
+        return row["transaction_isolation"]
+
+    assert run(scenario) == isolation.lower()
+
+
+def test_concurrent_creates_and_deletes_keep_headcount_consistent():
+    from app.departments import refresh_department_counts
+    from main import app
+
+    suffix = uuid.uuid4().hex[:8]
+    department = f"QA-{suffix}"
+
+    async def scenario():
+        await refresh_department_counts()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            created = await asyncio.gather(*(
+                client.post("/api/employees/", json={
+                    "employee_id": f"T{suffix}{index:02d}",
+                    "full_name": f"Test Employee {index}",
+                    "email": f"t{suffix}{index}@example.com",
+                    "department": department
+                })
+                for index in range(12)
+            ))
+            # The same employee ID raced from several requests is created once
+            duplicates = await asyncio.gather(*(
+                client.post("/api/employees/", json={
+                    "employee_id": f"T{suffix}DUP",
+                    "full_name": "Duplicate",
+                    "email": f"dup{attempt}{suffix}@example.com",
+                    "department": department
+                })
+                for attempt in range(5)
+            ))
+            ids = [response.json()["id"] for response in created if response.status_code == 201]
+            ids += [response.json()["id"] for response in duplicates if response.status_code == 201]
+
+            deleted = await asyncio.gather(*(client.delete(f"/api/employees/{employee_id}") for employee_id in ids[:5]))
+            directory = (await client.get("/api/departments/", headers={"X-Read-Consistency": "primary"})).json()
+
+            count = await get_prisma_client().employee.count(where={"department": department})
+            for employee_id in ids[5:]:
+                await client.delete(f"/api/employees/{employee_id}")
+
+        return created, duplicates, deleted, directory, count
+
+    created, duplicates, deleted, directory, count = run(scenario)
+
+    assert all(response.status_code == 201 for response in created)
+    assert sorted(response.status_code for response in duplicates) == [201, 400, 400, 400, 400]
+    assert all(response.status_code == 200 for response in deleted)
+    headcount = next(entry["headcount"] for entry in directory if entry["name"] == department)
+    assert headcount == count == 12 + 1 - 5
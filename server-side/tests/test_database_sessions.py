@@ -0,0 +1,161 @@
+import asyncio
+import random
+from itertools import cycle
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+
+from app import database
+from app.config import settings
+from app.database import get_read_client, get_transaction, read_routing_middleware, transaction
+
+
+class FakeTransaction:
+    def __init__(self):
+        self.statements = []
+        self.outcome = None
+
+    async def execute_raw(self, query):
+        self.statements.append(query)
+        return 0
+
+
+class FakeTransactionManager:
+    def __init__(self, client):
+        self.client = client
+
+    async def __aenter__(self):
+        self.transaction = FakeTransaction()
+        self.client.transactions.append(self.transaction)
+        return self.transaction
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Prisma commits on a clean exit and rolls back on any exception
+        self.transaction.outcome = "rollback" if exc_type else "commit"
+
+
+class FakeClient:
+    def __init__(self, name="primary", connected=True):
+        self.name = name
+        self.connected = connected
+        self.transactions = []
+
+    def is_connected(self):
+        return self.connected
+
+    def tx(self):
+        return FakeTransactionManager(self)
+
+
+@pytest.fixture
+def primary(monkeypatch):
+    primary = FakeClient()
+    monkeypatch.setattr(database, "_db", primary)
+    monkeypatch.setattr(database, "_replicas", [])
+    monkeypatch.setattr(database, "_replica_cycle", None)
+    return primary
+
+
+def test_transaction_sets_isolation_and_commits(primary):
+    async def scenario():
+        async with transaction(isolation="serializable") as tx:
+            await tx.execute_raw("SELECT 1")
+
+    asyncio.run(scenario())
+    [tx] = primary.transactions
+    assert tx.statements == ["SET TRANSACTION ISOLATION LEVEL SERIALIZABLE", "SELECT 1"]
+    assert tx.outcome == "commit"
+
+
+def test_transaction_defaults_to_configured_isolation(primary, monkeypatch):
+    monkeypatch.setattr(settings, "db_isolation_level", "REPEATABLE READ")
+
+    async def scenario():
+        async with transaction():
+            pass
+
+    asyncio.run(scenario())
+    assert primary.transactions[0].statements == ["SET TRANSACTION ISOLATION LEVEL REPEATABLE READ"]
+
+
+def test_transaction_rolls_back_on_http_exception(primary):
+    async def scenario():
+        async with transaction():
+            raise HTTPException(status_code=400, detail="Employee ID already exists")
+
+    with pytest.raises(HTTPException):
+        asyncio.run(scenario())
+    assert primary.transactions[0].outcome == "rollback"
+
+
+def test_transaction_rejects_unknown_isolation(primary):
+    async def scenario():
+        async with transaction(isolation="READ UNCOMMITTED; DROP TABLE employees"):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert primary.transactions == []
+
+
+def test_concurrent_requests_get_their_own_transaction(primary):
+    app = FastAPI()
+    seen = {}
+
+    @app.post("/items/{item}")
+    async def create_item(item: int, tx=Depends(get_transaction("SERIALIZABLE"), scope="function")):
+        seen[item] = tx
+        await asyncio.sleep(random.random() / 100)
+        if item % 2:
+            raise HTTPException(status_code=400, detail="odd items are rejected")
+        return {"item": item}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await asyncio.gather(*(client.post(f"/items/{item}") for item in range(20)))
+
+    responses = asyncio.run(scenario())
+
+    assert [response.status_code for response in responses] == [400 if item % 2 else 200 for item in range(20)]
+    # One transaction per request, never shared, each settled before the response
+    assert len({id(tx) for tx in seen.values()}) == 20
+    for item, tx in seen.items():
+        assert tx.statements == ["SET TRANSACTION ISOLATION LEVEL SERIALIZABLE"]
+        assert tx.outcome == ("rollback" if item % 2 else "commit")
+
+
+def test_read_routing_state_does_not_leak_between_concurrent_requests(primary, monkeypatch):
+    replica = FakeClient("replica")
+    monkeypatch.setattr(settings, "database_replica_urls", "postgresql://replica")
+    monkeypatch.setattr(database, "_replicas", [replica])
+    monkeypatch.setattr(database, "_replica_cycle", cycle([replica]))
+
+    app = FastAPI()
+    app.middleware("http")(read_routing_middleware)
+
+    @app.get("/read")
+    async def read():
+        # Check before and after yielding to the other in-flight requests
+        before = get_read_client().name
+        await asyncio.sleep(random.random() / 100)
+        return {"before": before, "after": get_read_client().name}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            wants_primary = [item % 3 == 0 for item in range(30)]
+            responses = await asyncio.gather(*(
+                client.get("/read", headers={"X-Read-Consistency": "primary"} if primary_read else None)
+                for primary_read in wants_primary
+            ))
+            return wants_primary, responses
+
+    wants_primary, responses = asyncio.run(scenario())
+
+    for primary_read, response in zip(wants_primary, responses):
+        expected = "primary" if primary_read else "replica"
+        assert response.json() == {"before": expected, "after": expected}
+    # Nothing is left set outside a request
+    assert database._read_from_primary.get() is False
@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+from app import departments
+from app.departments import HEADCOUNT_TRIGGER, require_department_trigger
+
+
+class FakeClient:
+    def __init__(self, installed):
+        self.installed = installed
+        self.queries = []
+
+    async def query_first(self, query, *args):
+        self.queries.append(args)
+        return {"count": int(self.installed)}
+
+
+def test_startup_fails_loudly_without_trigger(monkeypatch):
+    client = FakeClient(installed=False)
+    monkeypatch.setattr(departments, "get_prisma_client", lambda: client)
+
+    with pytest.raises(RuntimeError, match="manage_departments.py install"):
+        asyncio.run(require_department_trigger())
+    assert client.queries == [(HEADCOUNT_TRIGGER,)]
+
+
+def test_startup_check_runs_no_ddl(monkeypatch):
+    client = FakeClient(installed=True)
+    monkeypatch.setattr(departments, "get_prisma_client", lambda: client)
+
+    # FakeClient has no execute_raw, so any DDL here would raise
+    asyncio.run(require_department_trigger())
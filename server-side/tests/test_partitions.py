@@ -0,0 +1,50 @@
+from datetime import date
+
+from app.partitions import add_months, filter_partition_statements, parse_partition_name, partition_name
+
+DIFF_SCRIPT = """-- DropForeignKey
+ALTER TABLE "attendance_p2026_01" DROP CONSTRAINT "attendance_employeeId_fkey";
+
+-- DropTable
+DROP TABLE "attendance_p2026_01";
+
+-- DropTable
+DROP TABLE "attendance_default";
+
+-- DropTable
+DROP TABLE "attendance_expired_20260101_030000";
+
+-- CreateTable
+CREATE TABLE "departments" (
+    "name" TEXT NOT NULL,
+    "headcount" INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "departments_pkey" PRIMARY KEY ("name")
+);
+"""
+
+
+def test_add_months_crosses_year_boundaries():
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), -36) == date(2023, 1, 1)
+
+
+def test_partition_names_round_trip():
+    month = date(2026, 7, 1)
+    assert partition_name(month) == "attendance_p2026_07"
+    assert parse_partition_name(partition_name(month)) == month
+    assert parse_partition_name("attendance_default") is None
+
+
+def test_schema_diff_keeps_partitions():
+    script = filter_partition_statements(DIFF_SCRIPT)
+    assert "attendance_p2026_01" not in script
+    assert "attendance_default" not in script
+    assert "attendance_expired" not in script
+    assert 'CREATE TABLE "departments"' in script
+
+
+def test_schema_diff_without_changes_is_empty():
+    assert filter_partition_statements("-- This is an empty migration.") == ""
@@ -0,0 +1,179 @@
+import asyncio
+from itertools import cycle
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app import database
+from app.config import settings
+from app.database import get_read_db, read_routing_middleware
+
+
+class FakeClient:
+    def __init__(self, name, connected=True):
+        self.name = name
+        self.connected = connected
+        self.down = False
+        self.employee = FakeEmployeeActions(self)
+
+    def is_connected(self):
+        return self.connected
+
+    async def connect(self):
+        if self.down:
+            raise ConnectionError(f"{self.name} unreachable")
+        self.connected = True
+
+
+class FakeEmployeeActions:
+    def __init__(self, client):
+        self.client = client
+
+    async def find_first(self):
+        if self.client.down:
+            raise ConnectionError(f"{self.client.name} unreachable")
+        return self.client.name
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    primary = FakeClient("primary")
+    replicas = [FakeClient("replica-1"), FakeClient("replica-2")]
+    monkeypatch.setattr(settings, "database_replica_urls", "postgresql://replica-1,postgresql://replica-2")
+    monkeypatch.setattr(settings, "replica_sticky_seconds", 5)
+    monkeypatch.setattr(settings, "replica_retry_seconds", 30)
+    monkeypatch.setattr(database, "_replica_retry_at", {})
+    monkeypatch.setattr(database, "_reconnect_task", None)
+    monkeypatch.setattr(database, "_db", primary)
+    monkeypatch.setattr(database, "_replicas", replicas)
+    monkeypatch.setattr(database, "_replica_cycle", cycle(replicas))
+    return primary, replicas
+
+
+def build_app():
+    app = FastAPI()
+    app.middleware("http")(read_routing_middleware)
+
+    @app.get("/read")
+    async def read(db=Depends(get_read_db)):
+        return {"client": await db.employee.find_first()}
+
+    @app.post("/write")
+    async def write():
+        return {"ok": True}
+
+    return app
+
+
+def request(*calls):
+    """Run requests against a fresh app with one shared cookie jar"""
+    async def scenario():
+        transport = httpx.ASGITransport(app=build_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            results = [await call(client) for call in calls]
+        if database._reconnect_task:
+            await database._reconnect_task
+        return results
+    return asyncio.run(scenario())
+
+
+def read(headers=None):
+    async def call(client):
+        response = await client.get("/read", headers=headers)
+        return response.json()["client"]
+    return call
+
+
+def test_reads_round_robin_over_replicas(clients):
+    assert request(read(), read(), read(), read()) == ["replica-1", "replica-2", "replica-1", "replica-2"]
+
+
+def test_header_forces_primary(clients):
+    assert request(read({"X-Read-Consistency": "primary"}), read()) == ["primary", "replica-1"]
+
+
+def test_write_makes_reads_sticky_to_primary(clients):
+    async def write(client):
+        response = await client.post("/write")
+        assert response.headers["X-Read-Primary-For"] == "5"
+        return "write"
+
+    async def expire_cookie(client):
+        client.cookies.set(database.STICKY_PRIMARY_COOKIE, "0")
+        return "expired"
+
+    assert request(write, read(), read(), expire_cookie, read()) == [
+        "write", "primary", "primary", "expired", "replica-1"
+    ]
+
+
+def test_failed_write_is_not_sticky(clients):
+    async def failed_write(client):
+        response = await client.post("/missing")
+        assert "X-Read-Primary-For" not in response.headers
+        return response.status_code
+
+    assert request(failed_write, read()) == [404, "replica-1"]
+
+
+def test_disconnected_replica_is_skipped(clients):
+    _, replicas = clients
+    replicas[0].connected = False
+    replicas[0].down = True
+    assert request(read(), read(), read()) == ["replica-2", "replica-2", "replica-2"]
+
+
+def test_falls_back_to_primary_when_replicas_are_down(clients):
+    _, replicas = clients
+    for replica in replicas:
+        replica.connected = False
+        replica.down = True
+    assert request(read(), read()) == ["primary", "primary"]
+
+
+def test_replica_failing_at_runtime_is_retried_on_primary_and_skipped(clients):
+    _, replicas = clients
+    replicas[0].down = True
+    # The first read lands on the dead replica but is served by the primary
+    assert request(read(), read(), read(), read()) == ["primary", "replica-2", "replica-2", "replica-2"]
+
+
+def test_failed_replica_is_tried_again_after_retry_interval(clients, monkeypatch):
+    _, replicas = clients
+    replicas[0].down = True
+    assert request(read()) == ["primary"]
+
+    replicas[0].down = False
+    monkeypatch.setattr(database, "_replica_retry_at", {})
+    assert request(read(), read()) == ["replica-2", "replica-1"]
+
+
+def test_primary_error_is_raised_and_replica_kept(clients):
+    primary, replicas = clients
+    replicas[0].down = True
+    primary.down = True
+
+    async def failing_read(client):
+        with pytest.raises(ConnectionError, match="primary"):
+            await client.get("/read")
+        return "error"
+
+    assert request(failing_read) == ["error"]
+    assert database._replica_retry_at == {}
+
+
+def test_replica_down_at_startup_is_reconnected_lazily(clients):
+    _, replicas = clients
+    replicas[0].connected = False
+    replicas[0].down = True
+    # Still down: reads skip it and the reconnect attempt backs off
+    assert request(read(), read()) == ["replica-2", "replica-2"]
+    assert id(replicas[0]) in database._replica_retry_at
+
+    replicas[0].down = False
+    database._replica_retry_at.clear()
+    # This request schedules the reconnect in the background; later ones use it
+    assert request(read()) == ["replica-2"]
+    assert replicas[0].is_connected()
+    assert request(read(), read()) == ["replica-1", "replica-2"]